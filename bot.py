@@ -1,30 +1,90 @@
 import telebot
+import functools
 import logging
 import threading
 import time
 import atexit
+import queue
+from logging.handlers import QueueHandler, QueueListener
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
 from telebot.types import Message, InlineKeyboardMarkup, InlineKeyboardButton
-from datetime import datetime
 
 from config import Config
-from database import Database
+from database import get_database, parse_timestamp
 from github_api import GitHubAPI
 from monitor import MonitorManager
 from translation_manager import TranslationManager
 
+# Handlers only enqueue records; file and console I/O happens on the listener thread
+_log_formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+_log_handlers = [
+    logging.FileHandler(Config.LOG_FILE, encoding='utf-8'),
+    logging.StreamHandler()
+]
+for _handler in _log_handlers:
+    _handler.setFormatter(_log_formatter)
+
+_log_queue = queue.Queue(-1)
 logging.basicConfig(
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
     level=getattr(logging, Config.LOG_LEVEL),
-    handlers=[
-        logging.FileHandler(Config.LOG_FILE, encoding='utf-8'),
-        logging.StreamHandler()
-    ]
+    handlers=[QueueHandler(_log_queue)],
+    force=True
 )
+_log_listener = QueueListener(_log_queue, *_log_handlers, respect_handler_level=True)
+_log_listener.start()
+atexit.register(_log_listener.stop)
+
 logger = logging.getLogger(__name__)
 
-bot = telebot.TeleBot(Config.BOT_TOKEN)
-db = Database()
-github = GitHubAPI(Config.GITHUB_TOKEN)
+
+def _admin_only(handler):
+    """Ignore non-admin chats and pass chat_id and the user's language to the handler"""
+    @functools.wraps(handler)
+    def wrapper(self, message: Message):
+        chat_id = message.chat.id
+        if chat_id not in Config.ADMIN_CHAT_ID:
+            return
+        return handler(self, message, chat_id, self.get_user_language(chat_id))
+    return wrapper
+
+
+class DedupTeleBot(telebot.TeleBot):
+    """TeleBot that drops updates it has already dispatched (Telegram may redeliver them)"""
+    
+    SEEN_UPDATES_MAX = 1024
+    SEEN_UPDATES_TTL = 300
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._seen_updates = OrderedDict()
+        self._seen_lock = threading.Lock()
+    
+    def process_new_updates(self, updates):
+        now = time.monotonic()
+        fresh = []
+        
+        with self._seen_lock:
+            while self._seen_updates:
+                update_id, seen_at = next(iter(self._seen_updates.items()))
+                if now - seen_at < self.SEEN_UPDATES_TTL and len(self._seen_updates) < self.SEEN_UPDATES_MAX:
+                    break
+                self._seen_updates.popitem(last=False)
+            
+            for update in updates:
+                if update.update_id in self._seen_updates:
+                    logger.debug(f"Dropping duplicate update {update.update_id}")
+                    continue
+                self._seen_updates[update.update_id] = now
+                fresh.append(update)
+        
+        if fresh:
+            super().process_new_updates(fresh)
+
+
+bot = DedupTeleBot(Config.BOT_TOKEN)
+db = get_database()
+github = GitHubAPI(Config.GITHUB_TOKENS)
 translation = TranslationManager()
 monitor = MonitorManager(db, github, bot)
 
@@ -36,6 +96,8 @@ class BotHandler:
         self.github = github
         self.monitor = monitor
         self.translation = translation
+        self._lang_cache = {}
+        self._pool = ThreadPoolExecutor(max_workers=8)
         
         self.register_handlers()
     
@@ -84,10 +146,13 @@ class BotHandler:
         return chat_id in Config.ADMIN_CHAT_ID
     
     def get_user_language(self, chat_id: int) -> str:
-        language = self.db.get_user_language(chat_id)
+        language = self._lang_cache.get(chat_id)
         if language is None:
-            self.db.add_user(chat_id, None, Config.DEFAULT_LANGUAGE)
-            return Config.DEFAULT_LANGUAGE
+            language = self.db.get_user_language(chat_id)
+            if language is None:
+                self.db.add_user(chat_id, None, Config.DEFAULT_LANGUAGE)
+                language = Config.DEFAULT_LANGUAGE
+            self._lang_cache[chat_id] = language
         return language
     
     def handle_start(self, message: Message):
@@ -135,6 +200,7 @@ class BotHandler:
             language = call.data.split('_')[-1]
             
             self.db.update_user_language(chat_id, language)
+            self._lang_cache[chat_id] = language
             
             languages = self.translation.get_all_languages()
             lang_name = languages.get(language, language)
@@ -148,17 +214,11 @@ class BotHandler:
                 parse_mode='Markdown'
             )
             
-            time.sleep(1)
             welcome_msg = self.translation.get('welcome', language)
             self.bot.send_message(chat_id, welcome_msg, parse_mode='Markdown')
     
-    def handle_help(self, message: Message):
-        chat_id = message.chat.id
-        
-        if not self.check_admin(chat_id):
-            return
-        
-        language = self.get_user_language(chat_id)
+    @_admin_only
+    def handle_help(self, message: Message, chat_id: int, language: str):
         help_text = self.translation.get('help', language)
         
         self.bot.send_message(chat_id, help_text, parse_mode='Markdown')
@@ -171,13 +231,8 @@ class BotHandler:
         
         self.ask_for_language(chat_id)
     
-    def handle_add(self, message: Message):
-        chat_id = message.chat.id
-        
-        if not self.check_admin(chat_id):
-            return
-        
-        language = self.get_user_language(chat_id)
+    @_admin_only
+    def handle_add(self, message: Message, chat_id: int, language: str):
         args = message.text.split()
         
         if len(args) < 2:
@@ -224,11 +279,14 @@ class BotHandler:
         
         self.db.add_repository(chat_id, repo_full_name, repo_url, default_branch)
         
-        commits = self.github.get_latest_commits(repo_full_name, default_branch)
+        # Existing history is only recorded, never notified, so skip fetching change stats
+        commits, etag = self.github.get_latest_commits_conditional(repo_full_name, default_branch, detail_limit=0)
+        if etag:
+            self.db.set_etag(repo_full_name, default_branch, etag)
         if commits:
             latest_commit = commits[0]
             self.db.update_last_commit(repo_full_name, latest_commit['sha'], latest_commit['date'])
-            self.db.log_commit(latest_commit)
+            self.db.log_commits(commits)
         
         success_msg = self.translation.get(
             'repo_added',
@@ -246,13 +304,8 @@ class BotHandler:
             parse_mode='Markdown'
         )
     
-    def handle_remove(self, message: Message):
-        chat_id = message.chat.id
-        
-        if not self.check_admin(chat_id):
-            return
-        
-        language = self.get_user_language(chat_id)
+    @_admin_only
+    def handle_remove(self, message: Message, chat_id: int, language: str):
         args = message.text.split()
         
         if len(args) < 2:
@@ -275,13 +328,8 @@ class BotHandler:
         
         self.bot.reply_to(message, confirm_msg, parse_mode='Markdown')
     
-    def handle_list(self, message: Message):
-        chat_id = message.chat.id
-        
-        if not self.check_admin(chat_id):
-            return
-        
-        language = self.get_user_language(chat_id)
+    @_admin_only
+    def handle_list(self, message: Message, chat_id: int, language: str):
         repos = self.db.get_user_repos(chat_id)
         
         if not repos:
@@ -293,13 +341,10 @@ class BotHandler:
         
         for i, repo in enumerate(repos, 1):
             last_check = repo.get('last_check', 'Unknown')
-            if last_check and not isinstance(last_check, str):
+            if last_check:
                 try:
-                    last_check = datetime.strptime(
-                        str(last_check),
-                        '%Y-%m-%d %H:%M:%S.%f' if '.' in str(last_check) else '%Y-%m-%d %H:%M:%S'
-                    ).strftime('%H:%M')
-                except:
+                    last_check = parse_timestamp(last_check).strftime('%H:%M')
+                except ValueError:
                     last_check = 'Unknown'
             
             list_text += f"{i}. *{repo['repo_full_name']}*\n"
@@ -314,13 +359,8 @@ class BotHandler:
             disable_web_page_preview=True
         )
     
-    def handle_check(self, message: Message):
-        chat_id = message.chat.id
-        
-        if not self.check_admin(chat_id):
-            return
-        
-        language = self.get_user_language(chat_id)
+    @_admin_only
+    def handle_check(self, message: Message, chat_id: int, language: str):
         repos = self.db.get_user_repos(chat_id)
         
         if not repos:
@@ -336,29 +376,24 @@ class BotHandler:
         
         self.bot.send_message(chat_id, checking_msg, parse_mode='Markdown')
         
-        for repo in repos:
-            self.monitor.check_repository(
-                repo['repo_full_name'],
-                repo.get('branch', 'main')
-            )
+        futures = [
+            self._pool.submit(self.monitor.check_repository, repo['repo_full_name'], repo.get('branch', 'main'))
+            for repo in repos
+        ]
+        wait(futures)
         
         complete_msg = self.translation.get('check_complete', language)
         self.bot.send_message(chat_id, complete_msg, parse_mode='Markdown')
     
-    def handle_stats(self, message: Message):
-        chat_id = message.chat.id
-        
-        if not self.check_admin(chat_id):
-            return
-        
-        language = self.get_user_language(chat_id)
-        
-        user_repos = len(self.db.get_user_repos(chat_id))
-        all_repos = len(self.db.get_all_monitored_repos())
-        connection_status = '✅ Connected' if self.github.test_connection() else '❌ Disconnected'
+    @_admin_only
+    def handle_stats(self, message: Message, chat_id: int, language: str):
+        user_repos = self.db.count_user_repos(chat_id)
+        all_repos = self.db.count_monitored_repos()
+        connected = self.github.test_connection()
+        connection_status = '✅ Connected' if connected else '❌ Disconnected'
         
         if language == 'fa':
-            connection_status = '✅ متصل' if self.github.test_connection() else '❌ قطع'
+            connection_status = '✅ متصل' if connected else '❌ قطع'
         
         stats_text = self.translation.get(
             'stats',
@@ -369,15 +404,15 @@ class BotHandler:
             connection_status=connection_status
         )
         
-        repos = self.db.get_user_repos(chat_id)
-        if repos:
+        repo_names = self.db.list_user_repo_names(chat_id, limit=5)
+        if repo_names:
             if language == 'fa':
                 stats_text += "*آخرین ریپازیتوری‌های شما:*\n"
             else:
                 stats_text += "*Your Recent Repositories:*\n"
             
-            for i, repo in enumerate(repos[:5], 1):
-                stats_text += f"{i}. *{repo['repo_full_name']}*\n"
+            for i, repo_full_name in enumerate(repo_names, 1):
+                stats_text += f"{i}. *{repo_full_name}*\n"
         
         if language == 'fa':
             stats_text += f"\n📈 از دستور */add* برای افزودن ریپازیتوری جدید استفاده کنید."
@@ -386,14 +421,8 @@ class BotHandler:
         
         self.bot.send_message(chat_id, stats_text, parse_mode='Markdown')
     
-    def handle_status(self, message: Message):
-        chat_id = message.chat.id
-        
-        if not self.check_admin(chat_id):
-            return
-        
-        language = self.get_user_language(chat_id)
-        
+    @_admin_only
+    def handle_status(self, message: Message, chat_id: int, language: str):
         if self.github.test_connection():
             status_msg = self.translation.get('connection_ok', language)
         else:
@@ -401,13 +430,8 @@ class BotHandler:
         
         self.bot.send_message(chat_id, status_msg, parse_mode='Markdown')
     
-    def handle_unknown(self, message: Message):
-        chat_id = message.chat.id
-        
-        if not self.check_admin(chat_id):
-            return
-        
-        language = self.get_user_language(chat_id)
+    @_admin_only
+    def handle_unknown(self, message: Message, chat_id: int, language: str):
         unknown_msg = self.translation.get('unknown_command', language)
         
         self.bot.reply_to(message, unknown_msg, parse_mode='Markdown')
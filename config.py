@@ -13,6 +13,10 @@ class Config:
     GITHUB_TOKEN = os.getenv('GITHUB_TOKEN')
     if not GITHUB_TOKEN:
         raise ValueError("❌ GITHUB_TOKEN is not set in environment variables!")
+    # Several comma-separated tokens are used round-robin to multiply the rate limit
+    GITHUB_TOKENS = [t.strip() for t in GITHUB_TOKEN.split(',') if t.strip()]
+    if not GITHUB_TOKENS:
+        raise ValueError("❌ GITHUB_TOKEN does not contain any token!")
     
     CHECK_INTERVAL = int(os.getenv('CHECK_INTERVAL', 60))
     
@@ -22,23 +26,8 @@ class Config:
     
     LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
     
-    admin_ids_str = os.getenv('ADMIN_CHAT_IDS', '4575790772')
-    
-    try:
-        # حذف براکت‌ها و فاصله‌ها
-        admin_ids_str = admin_ids_str.strip()
-        
-        # حذف براکت شروع و پایان اگر وجود دارند
-        if admin_ids_str.startswith('[') and admin_ids_str.endswith(']'):
-            admin_ids_str = admin_ids_str[1:-1]
-        
-        if admin_ids_str:
-            # split کردن با کاما و تبدیل به عدد
-            ADMIN_CHAT_ID = [int(id.strip()) for id in admin_ids_str.split(',') if id.strip()]
-        else:
-            ADMIN_CHAT_ID = []
-    except ValueError:
-        raise ValueError("❌ ADMIN_CHAT_IDS must be comma-separated integers! Example: '123,456,789' or '[123,456,789]'")
+    # Accepts '123,456', '[123, 456]' or '123 456'
+    ADMIN_CHAT_ID = frozenset(int(x) for x in re.findall(r'-?\d+', os.getenv('ADMIN_CHAT_IDS', '4575790772')))
     
     LANGUAGES = {
         'en': 'English',
@@ -55,15 +44,16 @@ class Config:
         logger = logging.getLogger(__name__)
         
         # Check if using default admin ID (for security warning)
-        if cls.ADMIN_CHAT_ID == [4575790772]:
+        if cls.ADMIN_CHAT_ID == {4575790772}:
             logger.warning("⚠️  Using default ADMIN_CHAT_ID. Consider changing it in .env file!")
         
         # Validate tokens format (basic checks)
         if len(cls.BOT_TOKEN) < 10:
             logger.warning("⚠️  BOT_TOKEN seems too short!")
         
-        if not cls.GITHUB_TOKEN.startswith('ghp_') and not cls.GITHUB_TOKEN.startswith('github_pat_'):
-            logger.warning("⚠️  GITHUB_TOKEN format might be incorrect!")
+        for token in cls.GITHUB_TOKENS:
+            if not token.startswith('ghp_') and not token.startswith('github_pat_'):
+                logger.warning("⚠️  GITHUB_TOKEN format might be incorrect!")
         
         logger.info(f"✅ Config loaded: {len(cls.ADMIN_CHAT_ID)} admin(s), check interval: {cls.CHECK_INTERVAL}s")
 
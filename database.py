@@ -1,34 +1,116 @@
 import sqlite3
 import json
 import os
-from datetime import datetime
-from threading import Lock
-from typing import Dict, List, Optional
+from datetime import datetime, timezone
+from threading import Lock, RLock
+from typing import Dict, List, Optional, Set, Tuple
 from config import Config
 
 
+# Statements are kept as constants so every call hands sqlite3 the identical string
+# and hits its prepared-statement cache
+_SQL_ADD_USER = '''INSERT OR IGNORE INTO users (chat_id, username, language) VALUES (?, ?, ?)'''
+
+_SQL_GET_USER_LANG = '''SELECT language FROM users WHERE chat_id = ?'''
+
+_SQL_UPSERT_USER_LANG = '''INSERT INTO users (chat_id, language) VALUES (?, ?)
+    ON CONFLICT (chat_id) DO UPDATE SET language = excluded.language'''
+
+_SQL_ENSURE_USER = '''INSERT OR IGNORE INTO users (chat_id, language) VALUES (?, ?)'''
+
+_SQL_UPSERT_REPO = '''INSERT INTO repositories 
+    (chat_id, repo_full_name, repo_url, branch, last_check)
+    VALUES (?, ?, ?, ?, datetime('now', 'localtime'))
+    ON CONFLICT (chat_id, repo_full_name) DO UPDATE SET
+        repo_url = excluded.repo_url,
+        branch = excluded.branch,
+        last_check = excluded.last_check,
+        last_commit_sha = NULL,
+        last_commit_date = NULL,
+        last_commit_epoch = NULL,
+        last_etag = NULL'''
+
+_SQL_REMOVE_REPO = '''DELETE FROM repositories WHERE chat_id = ? AND repo_full_name = ?'''
+
+_SQL_GET_USER_REPOS = '''SELECT * FROM repositories WHERE chat_id = ? ORDER BY repo_full_name'''
+
+_SQL_COUNT_USER_REPOS = '''SELECT COUNT(*) FROM repositories WHERE chat_id = ?'''
+
+_SQL_COUNT_MONITORED_REPOS = '''SELECT COUNT(DISTINCT repo_full_name) FROM repositories'''
+
+_SQL_LIST_USER_REPO_NAMES = '''SELECT repo_full_name FROM repositories 
+    WHERE chat_id = ? ORDER BY repo_full_name LIMIT ?'''
+
+_SQL_GET_MONITORED_REPOS = '''SELECT DISTINCT repo_full_name, repo_url, branch FROM repositories'''
+
+_SQL_GET_SUBSCRIBERS = '''SELECT chat_id FROM repositories WHERE repo_full_name = ?'''
+
+_SQL_UPDATE_LAST_COMMIT = '''UPDATE repositories 
+    SET last_commit_sha = ?, 
+        last_commit_date = ?,
+        last_commit_epoch = ?,
+        last_check = datetime('now', 'localtime')
+    WHERE repo_full_name = ?'''
+
+_SQL_GET_ETAG = '''SELECT last_etag FROM repositories 
+    WHERE repo_full_name = ? AND branch = ? AND last_etag IS NOT NULL 
+    LIMIT 1'''
+
+_SQL_SET_ETAG = '''UPDATE repositories SET last_etag = ? WHERE repo_full_name = ? AND branch = ?'''
+
+_SQL_LOG_COMMIT = '''INSERT OR IGNORE INTO commit_history 
+    (repo_full_name, commit_sha, commit_message, 
+     author_name, author_email, commit_date, commit_url,
+     added, removed, modified, additions, deletions, changed_files)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)'''
+
+_SQL_IS_COMMIT_LOGGED = '''SELECT 1 FROM commit_history 
+    WHERE repo_full_name = ? AND commit_sha = ? 
+    LIMIT 1'''
+
+_SQL_GET_LOGGED_SHAS = '''SELECT commit_sha FROM commit_history 
+    WHERE repo_full_name = ? AND commit_sha IN ({placeholders})'''
+
+_SQL_GET_USER_LANGS = '''SELECT chat_id, language FROM users WHERE chat_id IN ({placeholders})'''
+
+# Stay under SQLITE_MAX_VARIABLE_NUMBER (999 on older SQLite builds) for IN (...) lists
+_SQL_MAX_VARIABLES = 900
+
+_SQL_GET_LAST_COMMIT_EPOCH = '''SELECT last_commit_epoch FROM repositories WHERE repo_full_name = ?'''
+
+_SQL_GET_LAST_COMMIT = '''SELECT last_commit_sha, last_commit_epoch FROM repositories WHERE repo_full_name = ?'''
+
+
+def parse_timestamp(value) -> Optional[datetime]:
+    """Parse a TIMESTAMP column value (with or without microseconds) into a datetime"""
+    if isinstance(value, str):
+        return datetime.fromisoformat(value.replace(' ', 'T'))
+    return value
+
+
+def to_epoch(value: datetime) -> int:
+    """Unix epoch seconds for a datetime; naive values are GitHub times and therefore UTC"""
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp())
+
+
 class Database:
-    _instance = None
-    _lock = Lock()
-    
-    def __new__(cls):
-        with cls._lock:
-            if cls._instance is None:
-                cls._instance = super().__new__(cls)
-                cls._instance._initialized = False
-            return cls._instance
-    
     def __init__(self):
-        if not self._initialized:
-            self.db_path = Config.DATABASE_PATH
-            self.lock = Lock()
-            self.init_db()
-            self._initialized = True
+        self.db_path = Config.DATABASE_PATH
+        self.lock = RLock()
+        self._conn = sqlite3.connect(self.db_path, check_same_thread=False, isolation_level=None,
+                                     cached_statements=256)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.execute('PRAGMA temp_store=MEMORY')
+        self._conn.execute('PRAGMA cache_size=-20000')
+        self.init_db()
     
     def init_db(self):
         with self.lock:
-            conn = sqlite3.connect(self.db_path)
-            c = conn.cursor()
+            c = self._conn.cursor()
             
             c.execute('''CREATE TABLE IF NOT EXISTS users
                         (chat_id INTEGER PRIMARY KEY, 
@@ -62,176 +144,181 @@ class Database:
                          modified INTEGER DEFAULT 0,
                          detected_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP)''')
             
-            conn.commit()
-            conn.close()
+            has_unique_index = c.execute("""SELECT 1 FROM sqlite_master 
+                                         WHERE type = 'index' AND name = 'idx_commit_repo_sha'""").fetchone()
+            if not has_unique_index:
+                # Drop duplicate history rows left by older versions so the unique index can be built
+                c.execute('''DELETE FROM commit_history 
+                            WHERE id NOT IN (SELECT MIN(id) FROM commit_history 
+                                             GROUP BY repo_full_name, commit_sha)''')
+            
+            c.execute('''CREATE UNIQUE INDEX IF NOT EXISTS idx_commit_repo_sha 
+                        ON commit_history (repo_full_name, commit_sha)''')
+            
+            c.execute('''CREATE INDEX IF NOT EXISTS idx_repos_name 
+                        ON repositories (repo_full_name)''')
+            
+            columns = {row['name'] for row in c.execute('PRAGMA table_info(repositories)')}
+            if 'last_etag' not in columns:
+                c.execute('''ALTER TABLE repositories ADD COLUMN last_etag TEXT''')
+            if 'last_commit_epoch' not in columns:
+                c.execute('''ALTER TABLE repositories ADD COLUMN last_commit_epoch INTEGER''')
+                c.execute('''UPDATE repositories 
+                            SET last_commit_epoch = CAST(strftime('%s', last_commit_date) AS INTEGER) 
+                            WHERE last_commit_date IS NOT NULL''')
+            
+            # added/removed/modified are per-file-status counts that only the REST detail fallback provides;
+            # the line and file totals below come from either source and stay NULL when no stats were fetched
+            history_columns = {row['name'] for row in c.execute('PRAGMA table_info(commit_history)')}
+            for column in ('additions', 'deletions', 'changed_files'):
+                if column not in history_columns:
+                    c.execute(f'''ALTER TABLE commit_history ADD COLUMN {column} INTEGER''')
     
     def add_user(self, chat_id: int, username: str = None, language: str = 'en'):
         with self.lock:
-            conn = sqlite3.connect(self.db_path)
-            c = conn.cursor()
-            c.execute('''INSERT OR IGNORE INTO users (chat_id, username, language) 
-                        VALUES (?, ?, ?)''', (chat_id, username, language))
-            conn.commit()
-            conn.close()
+            self._conn.execute(_SQL_ADD_USER, (chat_id, username, language))
     
     def get_user_language(self, chat_id: int) -> Optional[str]:
         """دریافت زبان کاربر - اگر کاربر وجود نداشت None برمی‌گرداند"""
-        with self.lock:
-            conn = sqlite3.connect(self.db_path)
-            c = conn.cursor()
-            c.execute('''SELECT language FROM users WHERE chat_id = ?''', (chat_id,))
-            result = c.fetchone()
-            conn.close()
-            
-            if result:
-                return result[0]
-            return None
+        result = self._conn.execute(_SQL_GET_USER_LANG, (chat_id,)).fetchone()
+        
+        if result:
+            return result[0]
+        return None
+    
+    def get_user_languages(self, chat_ids: List[int]) -> Dict[int, str]:
+        """Languages of several users at once; users that don't exist are left out"""
+        chat_ids = list(chat_ids)
+        languages = {}
+        for start in range(0, len(chat_ids), _SQL_MAX_VARIABLES):
+            chunk = chat_ids[start:start + _SQL_MAX_VARIABLES]
+            sql = _SQL_GET_USER_LANGS.format(placeholders=','.join('?' * len(chunk)))
+            languages.update((row[0], row[1]) for row in self._conn.execute(sql, chunk))
+        return languages
     
     def update_user_language(self, chat_id: int, language: str):
         with self.lock:
-            conn = sqlite3.connect(self.db_path)
-            c = conn.cursor()
-            
-            c.execute('''SELECT 1 FROM users WHERE chat_id = ?''', (chat_id,))
-            if not c.fetchone():
-                c.execute('''INSERT INTO users (chat_id, language) VALUES (?, ?)''', 
-                         (chat_id, language))
-            else:
-                c.execute('''UPDATE users SET language = ? WHERE chat_id = ?''', 
-                         (language, chat_id))
-            
-            conn.commit()
-            conn.close()
+            self._conn.execute(_SQL_UPSERT_USER_LANG, (chat_id, language))
     
     def add_repository(self, chat_id: int, repo_full_name: str, repo_url: str, branch: str = 'main'):
         with self.lock:
-            conn = sqlite3.connect(self.db_path)
-            c = conn.cursor()
-            
-            c.execute('''SELECT 1 FROM users WHERE chat_id = ?''', (chat_id,))
-            if not c.fetchone():
-                c.execute('''INSERT OR IGNORE INTO users (chat_id, language) VALUES (?, ?)''', 
-                         (chat_id, Config.DEFAULT_LANGUAGE))
-            
-            c.execute('''DELETE FROM repositories 
-                        WHERE chat_id = ? AND repo_full_name = ?''', 
-                     (chat_id, repo_full_name))
-            
-            c.execute('''INSERT INTO repositories 
-                        (chat_id, repo_full_name, repo_url, branch, last_check)
-                        VALUES (?, ?, ?, ?, ?)''',
-                     (chat_id, repo_full_name, repo_url, branch, datetime.now()))
-            
-            conn.commit()
-            conn.close()
+            c = self._conn.cursor()
+            c.execute(_SQL_ENSURE_USER, (chat_id, Config.DEFAULT_LANGUAGE))
+            c.execute(_SQL_UPSERT_REPO, (chat_id, repo_full_name, repo_url, branch))
     
     def remove_repository(self, chat_id: int, repo_full_name: str):
         with self.lock:
-            conn = sqlite3.connect(self.db_path)
-            c = conn.cursor()
-            c.execute('''DELETE FROM repositories 
-                        WHERE chat_id = ? AND repo_full_name = ?''',
-                     (chat_id, repo_full_name))
-            conn.commit()
-            conn.close()
+            self._conn.execute(_SQL_REMOVE_REPO, (chat_id, repo_full_name))
     
     def get_user_repos(self, chat_id: int) -> List[Dict]:
-        with self.lock:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
-            c = conn.cursor()
-            c.execute('''SELECT * FROM repositories 
-                        WHERE chat_id = ? 
-                        ORDER BY repo_full_name''', (chat_id,))
-            rows = c.fetchall()
-            conn.close()
-            return [dict(row) for row in rows]
+        cur = self._conn.execute(_SQL_GET_USER_REPOS, (chat_id,))
+        return [dict(row) for row in cur.fetchall()]
+    
+    def count_user_repos(self, chat_id: int) -> int:
+        return self._conn.execute(_SQL_COUNT_USER_REPOS, (chat_id,)).fetchone()[0]
+    
+    def count_monitored_repos(self) -> int:
+        return self._conn.execute(_SQL_COUNT_MONITORED_REPOS).fetchone()[0]
+    
+    def list_user_repo_names(self, chat_id: int, limit: int = 5) -> List[str]:
+        cur = self._conn.execute(_SQL_LIST_USER_REPO_NAMES, (chat_id, limit))
+        return [row[0] for row in cur.fetchall()]
     
     def get_all_monitored_repos(self) -> List[Dict]:
-        with self.lock:
-            conn = sqlite3.connect(self.db_path)
-            conn.row_factory = sqlite3.Row
-            c = conn.cursor()
-            c.execute('''SELECT DISTINCT repo_full_name, repo_url, branch 
-                        FROM repositories''')
-            rows = c.fetchall()
-            conn.close()
-            return [dict(row) for row in rows]
+        cur = self._conn.execute(_SQL_GET_MONITORED_REPOS)
+        return [dict(row) for row in cur.fetchall()]
     
     def get_repo_subscribers(self, repo_full_name: str) -> List[int]:
-        with self.lock:
-            conn = sqlite3.connect(self.db_path)
-            c = conn.cursor()
-            c.execute('''SELECT chat_id FROM repositories 
-                        WHERE repo_full_name = ?''', (repo_full_name,))
-            rows = c.fetchall()
-            conn.close()
-            return [row[0] for row in rows]
+        cur = self._conn.execute(_SQL_GET_SUBSCRIBERS, (repo_full_name,))
+        return [row[0] for row in cur.fetchall()]
     
     def update_last_commit(self, repo_full_name: str, commit_sha: str, commit_date: datetime):
         with self.lock:
-            conn = sqlite3.connect(self.db_path)
-            c = conn.cursor()
-            c.execute('''UPDATE repositories 
-                        SET last_commit_sha = ?, 
-                            last_commit_date = ?,
-                            last_check = ?
-                        WHERE repo_full_name = ?''',
-                     (commit_sha, commit_date, datetime.now(), repo_full_name))
-            conn.commit()
-            conn.close()
-    
-    def log_commit(self, commit_data: Dict):
+            self._conn.execute(_SQL_UPDATE_LAST_COMMIT,
+                               (commit_sha, commit_date, to_epoch(commit_date), repo_full_name))
+    
+    def get_etag(self, repo_full_name: str, branch: str) -> Optional[str]:
+        result = self._conn.execute(_SQL_GET_ETAG, (repo_full_name, branch)).fetchone()
+        return result[0] if result else None
+    
+    def set_etag(self, repo_full_name: str, branch: str, etag: Optional[str]):
         with self.lock:
-            conn = sqlite3.connect(self.db_path)
-            c = conn.cursor()
-            c.execute('''INSERT INTO commit_history 
-                        (repo_full_name, commit_sha, commit_message, 
-                         author_name, author_email, commit_date, commit_url,
-                         added, removed, modified)
-                        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)''',
-                     (commit_data['repo_full_name'],
-                      commit_data['sha'],
-                      commit_data['message'],
-                      commit_data['author_name'],
-                      commit_data['author_email'],
-                      commit_data['date'],
-                      commit_data['url'],
-                      commit_data.get('added', 0),
-                      commit_data.get('removed', 0),
-                      commit_data.get('modified', 0)))
-            conn.commit()
-            conn.close()
+            self._conn.execute(_SQL_SET_ETAG, (etag, repo_full_name, branch))
     
-    def is_commit_logged(self, repo_full_name: str, commit_sha: str) -> bool:
+    @staticmethod
+    def _commit_row(commit_data: Dict) -> tuple:
+        return (commit_data['repo_full_name'],
+                commit_data['sha'],
+                commit_data['message'],
+                commit_data['author_name'],
+                commit_data['author_email'],
+                commit_data['date'],
+                commit_data['url'],
+                commit_data.get('added', 0),
+                commit_data.get('removed', 0),
+                commit_data.get('modified', 0),
+                commit_data.get('additions'),
+                commit_data.get('deletions'),
+                commit_data.get('changed_files'))
+    
+    def log_commit(self, commit_data: Dict) -> bool:
+        """Log a commit; returns False if it was already in the history"""
+        return bool(self.log_commits([commit_data]))
+    
+    def log_commits(self, commits: List[Dict]) -> List[Dict]:
+        """Log several commits in a single transaction; returns the ones that were not logged before"""
+        if not commits:
+            return []
+        
         with self.lock:
-            conn = sqlite3.connect(self.db_path)
-            c = conn.cursor()
-            c.execute('''SELECT 1 FROM commit_history 
-                        WHERE repo_full_name = ? AND commit_sha = ? 
-                        LIMIT 1''', (repo_full_name, commit_sha))
-            result = c.fetchone()
-            conn.close()
-            return result is not None
+            c = self._conn.cursor()
+            c.execute('BEGIN')
+            try:
+                new_commits = []
+                for commit_data in commits:
+                    c.execute(_SQL_LOG_COMMIT, self._commit_row(commit_data))
+                    if c.rowcount == 1:
+                        new_commits.append(commit_data)
+                c.execute('COMMIT')
+            except Exception:
+                c.execute('ROLLBACK')
+                raise
+            return new_commits
+    
+    def is_commit_logged(self, repo_full_name: str, commit_sha: str) -> bool:
+        return self._conn.execute(_SQL_IS_COMMIT_LOGGED, (repo_full_name, commit_sha)).fetchone() is not None
+    
+    def get_logged_shas(self, repo_full_name: str, shas: List[str]) -> Set[str]:
+        """Return which of the given SHAs are already in the history, in one query per chunk"""
+        shas = list(shas)
+        logged = set()
+        for start in range(0, len(shas), _SQL_MAX_VARIABLES - 1):
+            chunk = shas[start:start + _SQL_MAX_VARIABLES - 1]
+            sql = _SQL_GET_LOGGED_SHAS.format(placeholders=','.join('?' * len(chunk)))
+            logged.update(row[0] for row in self._conn.execute(sql, [repo_full_name, *chunk]))
+        return logged
+    
+    def get_last_commit(self, repo_full_name: str) -> Tuple[Optional[str], Optional[datetime]]:
+        """SHA and date of the last processed commit, (None, None) before the first one"""
+        result = self._conn.execute(_SQL_GET_LAST_COMMIT, (repo_full_name,)).fetchone()
+        if not result:
+            return None, None
+        return result[0], datetime.fromtimestamp(result[1], tz=timezone.utc) if result[1] else None
     
     def get_last_commit_date(self, repo_full_name: str) -> Optional[datetime]:
-        with self.lock:
-            conn = sqlite3.connect(self.db_path)
-            c = conn.cursor()
-            c.execute('''SELECT last_commit_date FROM repositories 
-                        WHERE repo_full_name = ?''', (repo_full_name,))
-            result = c.fetchone()
-            conn.close()
-            
-            if result and result[0]:
-                try:
-                    if isinstance(result[0], str):
-                        return datetime.strptime(
-                            result[0], 
-                            '%Y-%m-%d %H:%M:%S.%f' if '.' in result[0] else '%Y-%m-%d %H:%M:%S'
-                        )
-                    else:
-                        return datetime.fromisoformat(str(result[0]))
-                except Exception:
-                    return None
-            return None
\ No newline at end of file
+        result = self._conn.execute(_SQL_GET_LAST_COMMIT_EPOCH, (repo_full_name,)).fetchone()
+        return datetime.fromtimestamp(result[0], tz=timezone.utc) if result and result[0] else None
+
+
+_db_instance: Optional[Database] = None
+_db_instance_lock = Lock()
+
+
+def get_database() -> Database:
+    """Return the process-wide Database, creating it on first use"""
+    global _db_instance
+    if _db_instance is None:
+        with _db_instance_lock:
+            if _db_instance is None:
+                _db_instance = Database()
+    return _db_instance
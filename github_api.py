@@ -1,30 +1,279 @@
 # github_api.py
+import itertools
 import requests
 import logging
-from datetime import datetime
-from typing import Dict, List, Optional
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timezone
+from threading import Lock
+from typing import Any, Dict, List, Optional, Tuple, Union
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+from rate_limiter import RateLimiter, github_rate_limiter
+
+try:
+    from ciso8601 import parse_datetime
+except ImportError:
+    def parse_datetime(value: str) -> datetime:
+        return datetime.fromisoformat(value.replace('Z', '+00:00'))
+
+try:
+    import orjson
+    
+    def decode_json(response: requests.Response) -> Any:
+        return orjson.loads(response.content) if response.content else {}
+except ImportError:
+    def decode_json(response: requests.Response) -> Any:
+        return response.json() if response.content else {}
 
 logger = logging.getLogger(__name__)
 
+GRAPHQL_COMMIT_HISTORY_QUERY = """
+query($owner: String!, $name: String!, $ref: String!, $first: Int!, $since: GitTimestamp) {
+  repository(owner: $owner, name: $name) {
+    object(expression: $ref) {
+      ... on Commit {
+        history(first: $first, since: $since) {
+          nodes {
+            oid
+            message
+            url
+            additions
+            deletions
+            changedFilesIfAvailable
+            author { name email date }
+          }
+        }
+      }
+    }
+  }
+}
+"""
+
 
 class GitHubAPI:
-    def __init__(self, token: str):
-        self.token = token
-        self.headers = {
+    MAX_RETRIES = 3
+    CONNECTION_CACHE_TTL = 30
+    REPO_INFO_CACHE_TTL = 1800
+    REPO_INFO_CACHE_SIZE = 256
+    COMMIT_DETAIL_CACHE_SIZE = 4096
+    # Concurrent detail fetches, and keep-alive connections kept per token. The pool must cover the
+    # detail workers plus monitor.CHECK_WORKERS (8 + 8, shared by the monitoring loop and /check),
+    # with headroom for handler calls such as /add and /stats, or sockets get discarded and re-opened
+    DETAIL_WORKERS = 8
+    MAX_CONNECTIONS = 20
+    
+    def __init__(self, token: Union[str, List[str]], rate_limiter: Optional[RateLimiter] = None):
+        tokens = [t.strip() for t in token.split(',')] if isinstance(token, str) else list(token)
+        tokens = [t for t in tokens if t]
+        
+        self.token = tokens[0]
+        self.headers = self._auth_headers(self.token)
+        self.base_url = 'https://api.github.com'
+        self.graphql_url = 'https://api.github.com/graphql'
+        if rate_limiter is None:
+            # Every token carries its own hourly budget, so the shared bucket scales with the pool
+            rate_limiter = github_rate_limiter if len(tokens) == 1 else RateLimiter(
+                rate=github_rate_limiter.rate * len(tokens),
+                capacity=github_rate_limiter.capacity * len(tokens)
+            )
+        self.rate_limiter = rate_limiter
+        self._connection_ok = None
+        self._connection_checked_at = 0.0
+        self._etag_cache: Dict[Tuple, Tuple[str, Any]] = {}
+        self._repo_info_cache: Dict[str, Tuple[float, Dict]] = {}
+        # Finished commits never change, so details are kept by SHA with LRU eviction only
+        self._commit_detail_cache: OrderedDict = OrderedDict()
+        self._cache_lock = Lock()
+        
+        # One keep-alive pool per token, used round-robin; a token whose budget is spent
+        # cools down until its X-RateLimit-Reset
+        self._sessions = [self._make_session(t) for t in tokens]
+        self._session_cooldown = [0.0] * len(self._sessions)
+        # Latest core-API budget seen per token; None until that token's first response
+        self._session_remaining: List[Optional[int]] = [None] * len(self._sessions)
+        self._session_reset: List[int] = [0] * len(self._sessions)
+        self._session_cycle = itertools.cycle(range(len(self._sessions)))
+        self._session_lock = Lock()
+        self._detail_pool = ThreadPoolExecutor(max_workers=self.DETAIL_WORKERS)
+    
+    @staticmethod
+    def _auth_headers(token: str) -> Dict[str, str]:
+        return {
             'Authorization': f'token {token}',
             'Accept': 'application/vnd.github.v3+json'
         }
-        self.base_url = 'https://api.github.com'
+    
+    def _make_session(self, token: str) -> requests.Session:
+        # One keep-alive pool per token instead of a new TLS handshake per call
+        session = requests.Session()
+        session.headers.update(self._auth_headers(token))
+        # Only transient 5xx are retried by urllib3; connect/read failures surface at once rather than
+        # holding a check slot through repeated timeouts, and 403/429 rate limits are handled in _request
+        retry = Retry(total=None, connect=0, read=0, status=3, status_forcelist=[502, 503, 504],
+                      backoff_factor=1.0, respect_retry_after_header=True, raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=10, pool_maxsize=self.MAX_CONNECTIONS, max_retries=retry)
+        session.mount('https://', adapter)
+        return session
+    
+    def _next_session(self) -> int:
+        """Index of the next token that is not cooling down, or the one that recovers first"""
+        with self._session_lock:
+            now = time.time()
+            for _ in range(len(self._sessions)):
+                index = next(self._session_cycle)
+                if self._session_cooldown[index] <= now:
+                    return index
+            return min(range(len(self._sessions)), key=self._session_cooldown.__getitem__)
+    
+    def _cool_down_session(self, index: int, response: requests.Response):
+        try:
+            reset = float(response.headers['X-RateLimit-Reset'])
+        except (KeyError, ValueError):
+            return
+        with self._session_lock:
+            self._session_cooldown[index] = max(self._session_cooldown[index], reset)
+    
+    def _get(self, url: str, headers: Dict = None, **kwargs) -> requests.Response:
+        return self._request('GET', url, headers=headers, **kwargs)
+    
+    def _request(self, method: str, url: str, headers: Dict = None, **kwargs) -> requests.Response:
+        """Send a request through the shared rate limiter, backing off on 403/429 rate-limit responses"""
+        pooled = len(self._sessions) > 1
+        
+        for attempt in range(self.MAX_RETRIES + 1):
+            index = self._next_session()
+            wait = self._session_cooldown[index] - time.time()
+            if wait > 0:
+                # Every token is spent; hold back until the first one resets
+                self.rate_limiter.pause(wait)
+            
+            with self.rate_limiter:
+                response = self._sessions[index].request(method, url, headers=headers, **kwargs)
+            self._record_rate_limit(index, response)
+            
+            if pooled:
+                remaining = response.headers.get('X-RateLimit-Remaining')
+                if remaining is not None and remaining.isdigit() and int(remaining) <= self.rate_limiter.low_watermark:
+                    self._cool_down_session(index, response)
+            else:
+                self.rate_limiter.update(response)
+            
+            if not self.rate_limiter.is_rate_limited(response) or attempt == self.MAX_RETRIES:
+                return response
+            
+            if pooled and response.headers.get('X-RateLimit-Remaining') == '0':
+                logger.warning(f"GitHub token #{index + 1} exhausted on {url}, switching token")
+                continue
+            
+            delay = self.rate_limiter.backoff_delay(response, attempt)
+            logger.warning(f"Rate limited on {url} ({response.status_code}), retrying in {delay:.0f}s")
+            self.rate_limiter.pause(delay)
+        
+        return response
+    
+    def _record_rate_limit(self, index: int, response: requests.Response):
+        # GraphQL has its own budget; only REST responses describe the core limit
+        if response.headers.get('X-RateLimit-Resource', 'core') != 'core':
+            return
+        try:
+            remaining = int(response.headers['X-RateLimit-Remaining'])
+            reset = int(response.headers.get('X-RateLimit-Reset', 0))
+        except (KeyError, ValueError):
+            return
+        with self._session_lock:
+            self._session_remaining[index] = remaining
+            self._session_reset[index] = reset
+    
+    def _usable_budget(self) -> Optional[Tuple[int, int]]:
+        """(remaining, token count) over tokens not cooling down; None while any of them is unknown"""
+        now = time.time()
+        total = count = 0
+        with self._session_lock:
+            for remaining, reset, cooldown in zip(self._session_remaining, self._session_reset,
+                                                  self._session_cooldown):
+                if cooldown > now:
+                    continue
+                # A token past its reset has a fresh budget we haven't seen yet
+                if remaining is None or reset <= now:
+                    return None
+                total += remaining
+                count += 1
+        return total, count
+    
+    @property
+    def rate_limit_remaining(self) -> Optional[int]:
+        """Core budget left across tokens that are not cooling down; None while any of them is unknown"""
+        budget = self._usable_budget()
+        return budget[0] if budget else None
+    
+    @property
+    def rate_limit_reset(self) -> Optional[int]:
+        """Earliest upcoming reset among the tokens seen so far"""
+        now = time.time()
+        with self._session_lock:
+            resets = [reset for reset in self._session_reset if reset > now]
+        return min(resets) if resets else None
+    
+    def has_rate_budget(self, needed: int) -> bool:
+        """False when the usable tokens cannot cover `needed` requests above the limiter's low watermark.
+        
+        At the watermark the limiter pauses every caller (or cools the token down), so callers that
+        want to degrade instead of block must check against that line, not against zero.
+        """
+        budget = self._usable_budget()
+        if budget is None:
+            return True
+        remaining, count = budget
+        return remaining - count * self.rate_limiter.low_watermark >= needed
+    
+    def _conditional_get(self, url: str, params: Dict = None, **kwargs) -> Tuple[requests.Response, Any]:
+        """GET with If-None-Match from the per-URL ETag cache.
+        
+        Returns (response, data); data is the decoded JSON for a 200 or a cached 304, otherwise None.
+        """
+        cache_key = (url, tuple(sorted(params.items())) if params else None)
+        cached = self._etag_cache.get(cache_key)
+        headers = {'If-None-Match': cached[0]} if cached else None
+        
+        response = self._get(url, headers=headers, params=params, **kwargs)
+        
+        if response.status_code == 304 and cached:
+            return response, cached[1]
+        if response.status_code == 200:
+            data = decode_json(response)
+            etag = response.headers.get('ETag')
+            if etag:
+                self._etag_cache[cache_key] = (etag, data)
+            return response, data
+        return response, None
+    
+    def close(self):
+        """Release pooled connections and worker threads"""
+        self._detail_pool.shutdown(wait=False)
+        for session in self._sessions:
+            session.close()
     
     def get_repo_info(self, repo_full_name: str) -> Optional[Dict]:
         """Get repository information from GitHub API"""
+        with self._cache_lock:
+            cached = self._repo_info_cache.get(repo_full_name)
+        if cached and time.monotonic() - cached[0] < self.REPO_INFO_CACHE_TTL:
+            return cached[1]
+        
         try:
             url = f'{self.base_url}/repos/{repo_full_name}'
-            response = requests.get(url, headers=self.headers, timeout=10)
+            response, repo_info = self._conditional_get(url, timeout=10)
             
-            if response.status_code == 200:
+            if repo_info is not None:
                 logger.info(f"Successfully fetched repo info for: {repo_full_name}")
-                return response.json()
+                with self._cache_lock:
+                    if len(self._repo_info_cache) >= self.REPO_INFO_CACHE_SIZE:
+                        self._repo_info_cache.pop(next(iter(self._repo_info_cache)))
+                    self._repo_info_cache[repo_full_name] = (time.monotonic(), repo_info)
+                return repo_info
             elif response.status_code == 404:
                 logger.warning(f"Repository not found: {repo_full_name}")
             elif response.status_code == 403:
@@ -49,6 +298,21 @@ class GitHubAPI:
     
     def get_latest_commits(self, repo_full_name: str, branch: str = 'main', since: datetime = None) -> List[Dict]:
         """Get latest commits from a repository"""
+        commits = self.get_latest_commits_graphql(repo_full_name, branch, since)
+        if commits is None:
+            commits, _ = self.get_latest_commits_conditional(repo_full_name, branch, since, graphql_details=False)
+        return commits or []
+    
+    def get_latest_commits_conditional(self, repo_full_name: str, branch: str = 'main', since: datetime = None,
+                                       etag: str = None, graphql_details: bool = True,
+                                       detail_limit: Optional[int] = None
+                                       ) -> Tuple[Optional[List[Dict]], Optional[str]]:
+        """Get latest commits, sending If-None-Match when an ETag is known.
+        
+        Returns (commits, etag); commits is None when GitHub answered 304 Not Modified.
+        Change stats come from one GraphQL request unless graphql_details is False, and
+        only the newest detail_limit commits get them (all when None, none when 0).
+        """
         try:
             url = f'{self.base_url}/repos/{repo_full_name}/commits'
             
@@ -58,71 +322,28 @@ class GitHubAPI:
                 
             logger.info(f"Fetching commits for {repo_full_name} (branch: {branch}) since {since if since else 'beginning'}")
             
-            response = requests.get(url, headers=self.headers, params=params, timeout=15)
+            headers = {'If-None-Match': etag} if etag else None
             
-            if response.status_code == 200:
-                commits = response.json()
-                parsed_commits = []
+            response = self._get(url, headers=headers, params=params, timeout=15)
+            
+            if response.status_code == 304:
+                logger.info(f"Commits for {repo_full_name} not modified since last check")
+                return None, etag
+            elif response.status_code == 200:
+                commits = decode_json(response)
                 
                 logger.info(f"Retrieved {len(commits)} commits from {repo_full_name}")
                 
-                for commit in commits:
-                    try:
-                        # Parse basic commit info
-                        commit_info = {
-                            'sha': commit['sha'],
-                            'message': commit['commit']['message'].strip(),
-                            'author_name': commit['commit']['author']['name'],
-                            'author_email': commit['commit']['author']['email'],
-                            'date': datetime.strptime(
-                                commit['commit']['author']['date'],
-                                '%Y-%m-%dT%H:%M:%SZ'
-                            ),
-                            'url': commit['html_url'],
-                            'repo_full_name': repo_full_name,
-                            'added': 0,
-                            'removed': 0,
-                            'modified': 0,
-                            'files': []
-                        }
-                        
-                        # Try to get detailed commit information
-                        try:
-                            detail_url = f'{self.base_url}/repos/{repo_full_name}/commits/{commit["sha"]}'
-                            detail_resp = requests.get(detail_url, headers=self.headers, timeout=10)
-                            
-                            if detail_resp.status_code == 200:
-                                detail = detail_resp.json()
-                                if 'files' in detail:
-                                    for f in detail['files']:
-                                        status = f.get('status', '')
-                                        if status == 'added':
-                                            commit_info['added'] += 1
-                                        elif status == 'removed':
-                                            commit_info['removed'] += 1
-                                        elif status == 'modified':
-                                            commit_info['modified'] += 1
-                                    
-                                    commit_info['files'] = [f['filename'] for f in detail['files'][:5]]
-                                    logger.debug(f"Got file details for commit {commit['sha'][:7]}: "
-                                                f"+{commit_info['added']} -{commit_info['removed']} ~{commit_info['modified']}")
-                        except Exception as e:
-                            logger.warning(f"Failed to get commit details for {commit['sha'][:7]}: {str(e)}")
-                        
-                        parsed_commits.append(commit_info)
-                        
-                    except KeyError as e:
-                        logger.warning(f"Missing field in commit data for {repo_full_name}: {str(e)}")
-                        continue
-                    except ValueError as e:
-                        logger.warning(f"Date parsing error for commit in {repo_full_name}: {str(e)}")
-                        continue
-                    except Exception as e:
-                        logger.warning(f"Error parsing commit in {repo_full_name}: {str(e)}")
-                        continue
+                parsed_commits = [
+                    commit_info for commit_info in
+                    (self._parse_commit_summary(repo_full_name, commit) for commit in commits)
+                    if commit_info is not None
+                ]
+                
+                self._add_commit_details(repo_full_name, branch, since, parsed_commits[:detail_limit], graphql_details)
                 
                 logger.info(f"Successfully parsed {len(parsed_commits)} commits for {repo_full_name}")
-                return parsed_commits
+                return parsed_commits, response.headers.get('ETag')
                 
             elif response.status_code == 404:
                 logger.error(f"Repository {repo_full_name} not found")
@@ -142,16 +363,200 @@ class GitHubAPI:
         except Exception as e:
             logger.error(f"Unexpected error for commits in {repo_full_name}: {str(e)}")
             
-        return []
+        return [], None
+    
+    def get_latest_commits_graphql(self, repo_full_name: str, branch: str = 'main',
+                                   since: datetime = None, limit: int = 20) -> Optional[List[Dict]]:
+        """Get latest commits with their change stats in a single GraphQL request.
+        
+        Returns None when the GraphQL call fails so callers can fall back to REST.
+        """
+        owner, _, name = repo_full_name.partition('/')
+        variables = {'owner': owner, 'name': name, 'ref': branch, 'first': limit}
+        if since:
+            variables['since'] = since.strftime('%Y-%m-%dT%H:%M:%SZ')
+        
+        try:
+            response = self._request('POST', self.graphql_url, timeout=15,
+                                     json={'query': GRAPHQL_COMMIT_HISTORY_QUERY, 'variables': variables})
+            if response.status_code != 200:
+                logger.warning(f"GraphQL error {response.status_code} for {repo_full_name}")
+                return None
+            
+            payload = decode_json(response)
+            if payload.get('errors'):
+                logger.warning(f"GraphQL errors for {repo_full_name}: {payload['errors'][0].get('message')}")
+                return None
+            
+            target = ((payload.get('data') or {}).get('repository') or {}).get('object')
+            if not target or 'history' not in target:
+                logger.warning(f"GraphQL returned no history for {repo_full_name} (branch: {branch})")
+                return None
+            
+            commits = []
+            for node in target['history']['nodes']:
+                commits.append({
+                    'sha': node['oid'],
+                    'message': node['message'].strip(),
+                    'author_name': node['author']['name'],
+                    'author_email': node['author']['email'],
+                    'date': parse_datetime(node['author']['date']).astimezone(timezone.utc),
+                    'url': node['url'],
+                    'repo_full_name': repo_full_name,
+                    'added': 0,
+                    'removed': 0,
+                    'modified': 0,
+                    'files': [],
+                    'additions': node.get('additions') or 0,
+                    'deletions': node.get('deletions') or 0,
+                    'changed_files': node.get('changedFilesIfAvailable') or 0
+                })
+            
+            logger.info(f"Retrieved {len(commits)} commits for {repo_full_name} via GraphQL")
+            return commits
+        except Exception as e:
+            logger.warning(f"GraphQL request failed for {repo_full_name}: {str(e)}")
+            return None
+    
+    def _add_commit_details(self, repo_full_name: str, branch: str, since: Optional[datetime],
+                            commits: List[Dict], use_graphql: bool = True):
+        """Fill in change stats: one GraphQL request for the batch, REST per commit for anything it missed"""
+        if not commits:
+            return
+        
+        missing = []
+        for commit_info in commits:
+            detail = self._get_cached_commit_detail((repo_full_name, commit_info['sha']))
+            if detail:
+                commit_info.update(detail)
+            else:
+                missing.append(commit_info)
+        
+        if not missing:
+            return
+        
+        graphql_commits = None
+        if use_graphql:
+            graphql_commits = self.get_latest_commits_graphql(repo_full_name, branch, since, limit=len(commits))
+        if graphql_commits:
+            stats = {
+                c['sha']: {key: c[key] for key in ('additions', 'deletions', 'changed_files')}
+                for c in graphql_commits
+            }
+            still_missing = []
+            for commit_info in missing:
+                detail = stats.get(commit_info['sha'])
+                if detail:
+                    commit_info.update(detail)
+                    self._cache_commit_detail((repo_full_name, commit_info['sha']), detail)
+                else:
+                    still_missing.append(commit_info)
+            missing = still_missing
+        
+        if not missing:
+            return
+        
+        # Leave headroom so a detail fan-out can't drain the hourly budget
+        if not self.has_rate_budget(len(missing) + 10):
+            logger.warning(f"Rate limit low ({self.rate_limit_remaining} left), "
+                           f"skipping file details for {len(missing)} commits in {repo_full_name}")
+            return
+        
+        # REST fallback: detail requests are independent, so overlap their round-trips
+        details = self._detail_pool.map(
+            lambda c: self._fetch_commit_detail(repo_full_name, c['sha']),
+            missing
+        )
+        for commit_info, detail in zip(missing, details):
+            if detail:
+                commit_info.update(detail)
+    
+    def _get_cached_commit_detail(self, cache_key: Tuple[str, str]) -> Optional[Dict]:
+        with self._cache_lock:
+            detail = self._commit_detail_cache.get(cache_key)
+            if detail is not None:
+                self._commit_detail_cache.move_to_end(cache_key)
+            return detail
+    
+    def _cache_commit_detail(self, cache_key: Tuple[str, str], detail: Dict):
+        with self._cache_lock:
+            self._commit_detail_cache[cache_key] = detail
+            if len(self._commit_detail_cache) > self.COMMIT_DETAIL_CACHE_SIZE:
+                self._commit_detail_cache.popitem(last=False)
+    
+    def _parse_commit_summary(self, repo_full_name: str, commit: Dict) -> Optional[Dict]:
+        """Build a commit_info dict from an entry of the commits list"""
+        try:
+            return {
+                'sha': commit['sha'],
+                'message': commit['commit']['message'].strip(),
+                'author_name': commit['commit']['author']['name'],
+                'author_email': commit['commit']['author']['email'],
+                'date': parse_datetime(commit['commit']['author']['date']),
+                'url': commit['html_url'],
+                'repo_full_name': repo_full_name,
+                'added': 0,
+                'removed': 0,
+                'modified': 0,
+                'files': []
+            }
+        except KeyError as e:
+            logger.warning(f"Missing field in commit data for {repo_full_name}: {str(e)}")
+        except ValueError as e:
+            logger.warning(f"Date parsing error for commit in {repo_full_name}: {str(e)}")
+        except Exception as e:
+            logger.warning(f"Error parsing commit in {repo_full_name}: {str(e)}")
+        return None
+    
+    def _fetch_commit_detail(self, repo_full_name: str, sha: str) -> Optional[Dict]:
+        """Fetch per-file change counts for a single commit"""
+        cache_key = (repo_full_name, sha)
+        cached = self._get_cached_commit_detail(cache_key)
+        if cached:
+            return cached
+        
+        try:
+            detail_url = f'{self.base_url}/repos/{repo_full_name}/commits/{sha}'
+            detail_resp = self._get(detail_url, timeout=10)
+            
+            if detail_resp.status_code == 200:
+                detail = decode_json(detail_resp)
+                if 'files' in detail:
+                    counts = {'added': 0, 'removed': 0, 'modified': 0}
+                    for f in detail['files']:
+                        status = f.get('status', '')
+                        if status in counts:
+                            counts[status] += 1
+                    
+                    counts['files'] = [f['filename'] for f in detail['files'][:5]]
+                    stats = detail.get('stats', {})
+                    counts['additions'] = stats.get('additions', 0)
+                    counts['deletions'] = stats.get('deletions', 0)
+                    counts['changed_files'] = len(detail['files'])
+                    logger.debug(f"Got file details for commit {sha[:7]}: "
+                                f"+{counts['added']} -{counts['removed']} ~{counts['modified']}")
+                    self._cache_commit_detail(cache_key, counts)
+                    return counts
+        except Exception as e:
+            logger.warning(f"Failed to get commit details for {sha[:7]}: {str(e)}")
+        return None
     
     def test_connection(self) -> bool:
-        """Test GitHub API connection"""
+        """Test GitHub API connection, reusing the result for CONNECTION_CACHE_TTL seconds"""
+        now = time.monotonic()
+        if self._connection_ok is not None and now - self._connection_checked_at < self.CONNECTION_CACHE_TTL:
+            return self._connection_ok
+        
+        self._connection_ok = self._do_test_connection()
+        self._connection_checked_at = now
+        return self._connection_ok
+    
+    def _do_test_connection(self) -> bool:
         try:
             url = f'{self.base_url}/user'
-            response = requests.get(url, headers=self.headers, timeout=10)
+            response, user_data = self._conditional_get(url, timeout=10)
             
-            if response.status_code == 200:
-                user_data = response.json()
+            if user_data is not None:
                 logger.info(f"Successfully connected to GitHub as: {user_data.get('login')}")
                 return True
             elif response.status_code == 401:
@@ -177,10 +582,10 @@ class GitHubAPI:
         """Get GitHub API rate limit status"""
         try:
             url = f'{self.base_url}/rate_limit'
-            response = requests.get(url, headers=self.headers, timeout=10)
+            response = self._get(url, timeout=10)
             
             if response.status_code == 200:
-                return response.json()
+                return decode_json(response)
             return {}
         except Exception as e:
             logger.error(f"Error getting rate limit: {str(e)}")
@@ -190,10 +595,9 @@ class GitHubAPI:
         """Get all branches of a repository"""
         try:
             url = f'{self.base_url}/repos/{repo_full_name}/branches'
-            response = requests.get(url, headers=self.headers, timeout=10)
+            response, branches = self._conditional_get(url, timeout=10)
             
-            if response.status_code == 200:
-                branches = response.json()
+            if branches is not None:
                 logger.info(f"Retrieved {len(branches)} branches for {repo_full_name}")
                 return branches
             else:
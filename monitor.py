@@ -1,9 +1,11 @@
 import logging
 import time
-from datetime import datetime, timedelta
-from threading import Thread
-from typing import Dict, List
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime, timedelta, timezone
+from threading import BoundedSemaphore, Event, Thread
+from typing import Dict, List, Optional
 import telebot
+from telebot.apihelper import ApiTelegramException
 
 from database import Database
 from github_api import GitHubAPI
@@ -12,106 +14,214 @@ from translation_manager import TranslationManager
 
 logger = logging.getLogger(__name__)
 
+TELEGRAM_MESSAGE_LIMIT = 4096
+COMMIT_SEPARATOR = '\n\n---\n\n'
+# Repositories checked at once, counting the monitoring loop and /check together (see check_repository);
+# with GitHubAPI.DETAIL_WORKERS that is 16 concurrent requests, within GitHubAPI.MAX_CONNECTIONS
+CHECK_WORKERS = 8
+# Commits shown in full per notification; older ones only count towards the summary
+NOTIFY_COMMIT_LIMIT = 5
+# Seconds stop_monitoring waits for an in-flight check; rate-limit pauses can last until the hourly reset
+STOP_TIMEOUT = 10
+
+# Per-language fragments of the commit notification, so formatting does no language branching
+CHANGE_LABELS = {
+    'fa': {
+        'added': "➕ {n} فایل جدید\n",
+        'removed': "➖ {n} فایل حذف شده\n",
+        'modified': "✏️ {n} فایل تغییر یافته\n",
+        'changed_files': "📝 {n} فایل تغییر کرده (+{additions} / -{deletions} خط)\n",
+        'changes_header': "📊 *تغییرات:*",
+        'links': """🔗 *لینک‌ها:*
+• [مشاهده کامیت در GitHub]({commit_url})
+• [مشاهده ریپازیتوری](https://github.com/{repo_full_name})"""
+    },
+    'en': {
+        'added': "➕ {n} new files\n",
+        'removed': "➖ {n} files removed\n",
+        'modified': "✏️ {n} files modified\n",
+        'changed_files': "📝 {n} files changed (+{additions} / -{deletions} lines)\n",
+        'changes_header': "📊 *Changes:*",
+        'links': """🔗 *Links:*
+• [View commit on GitHub]({commit_url})
+• [View repository](https://github.com/{repo_full_name})"""
+    }
+}
+
 
 class MonitorManager:
     def __init__(self, db: Database, github_api: GitHubAPI, bot: telebot.TeleBot):
         self.db = db
         self.github = github_api
         self.bot = bot
-        self.running = True
         self.translation = TranslationManager()
+        self._stop_event = Event()
+        self._check_slots = BoundedSemaphore(CHECK_WORKERS)
+        self._monitor_thread: Optional[Thread] = None
+    
+    @property
+    def running(self) -> bool:
+        return not self._stop_event.is_set()
     
     def check_all_repositories(self):
         try:
             repos = self.db.get_all_monitored_repos()
             logger.info(f"Checking {len(repos)} repositories...")
             
-            for repo in repos:
-                self.check_repository(repo['repo_full_name'], repo['branch'])
+            if not repos:
+                return
+            
+            if not self.github.has_rate_budget(len(repos)):
+                logger.warning(f"GitHub rate limit low ({self.github.rate_limit_remaining} left), "
+                               f"skipping this check of {len(repos)} repositories")
+                return
+            
+            # Repositories are independent, so overlap their GitHub round-trips
+            with ThreadPoolExecutor(max_workers=min(CHECK_WORKERS, len(repos))) as executor:
+                futures = {
+                    executor.submit(self.check_repository, repo['repo_full_name'], repo['branch']): repo['repo_full_name']
+                    for repo in repos
+                }
+                for future in as_completed(futures):
+                    try:
+                        future.result()
+                    except Exception as e:
+                        logger.error(f"Error checking repository {futures[future]}: {e}")
                 
         except Exception as e:
             logger.error(f"Error in check_all_repositories: {e}")
     
     def check_repository(self, repo_full_name: str, branch: str = 'main'):
+        # The monitoring loop and /check share these slots, so together they run at most CHECK_WORKERS checks
+        with self._check_slots:
+            self._check_repository(repo_full_name, branch)
+    
+    def _check_repository(self, repo_full_name: str, branch: str):
         try:
             logger.info(f"Checking repository: {repo_full_name}")
             
-            last_commit_date = self.db.get_last_commit_date(repo_full_name)
+            last_commit_sha, last_commit_date = self.db.get_last_commit(repo_full_name)
             
             if not last_commit_date:
-                last_commit_date = datetime.now() - timedelta(hours=24)
+                last_commit_date = datetime.now(timezone.utc) - timedelta(hours=24)
                 logger.info(f"First check for {repo_full_name}, checking last 24 hours")
             
-            commits = self.github.get_latest_commits(repo_full_name, branch, last_commit_date)
+            etag = self.db.get_etag(repo_full_name, branch)
+            # Only the commits a notification shows in full need their change stats
+            commits, new_etag = self.github.get_latest_commits_conditional(
+                repo_full_name, branch, last_commit_date, etag, detail_limit=NOTIFY_COMMIT_LIMIT
+            )
+            
+            if commits is None:
+                logger.info(f"Repository {repo_full_name} not modified, skipping")
+                return
             
             if not commits:
                 logger.info(f"No new commits found for {repo_full_name}")
+                self._save_etag(repo_full_name, branch, etag, new_etag)
+                return
+            
+            # `since` is inclusive, so a quiet repository keeps returning its last known commit. Compare
+            # SHAs, not dates: rebased or cherry-picked commits keep older author dates
+            if last_commit_sha and commits[0]['sha'] == last_commit_sha:
+                logger.info(f"Head of {repo_full_name} is still {last_commit_sha[:7]}, no new commits")
+                # Safe to keep: a later 304 means the same body, so the head is still last_commit_sha
+                self._save_etag(repo_full_name, branch, etag, new_etag)
                 return
                 
-            new_commits = []
-            for commit in commits:
-                if not self.db.is_commit_logged(repo_full_name, commit['sha']):
-                    new_commits.append(commit)
+            # One read filters out known commits, so a tick with nothing new never takes the write lock
+            logged = self.db.get_logged_shas(repo_full_name, [commit['sha'] for commit in commits])
+            candidates = [commit for commit in commits if commit['sha'] not in logged]
+            # log_commits still reports only rows it inserted, in case another check raced us
+            new_commits = self.db.log_commits(candidates)
                     
             if new_commits:
                 logger.info(f"Found {len(new_commits)} new commits in {repo_full_name}")
                 self.process_new_commits(repo_full_name, new_commits)
             else:
                 logger.info(f"No new commits to process for {repo_full_name}")
+            
+            # Only now is everything behind this ETag logged, so a later 304 can't hide unseen commits
+            self._save_etag(repo_full_name, branch, etag, new_etag)
                 
         except Exception as e:
             logger.error(f"Error checking repository {repo_full_name}: {e}")
     
+    def _save_etag(self, repo_full_name: str, branch: str, old_etag: Optional[str], new_etag: Optional[str]):
+        if new_etag and new_etag != old_etag:
+            self.db.set_etag(repo_full_name, branch, new_etag)
+    
     def process_new_commits(self, repo_full_name: str, commits: List[Dict]):
-        commits.sort(key=lambda x: x['date'], reverse=True)
-        
-        for commit in commits:
-            self.db.log_commit(commit)
-            
         if commits:
+            # GitHub lists history newest-first and the filtering above keeps that order
             latest_commit = commits[0]
             self.db.update_last_commit(repo_full_name, latest_commit['sha'], latest_commit['date'])
             
             subscribers = self.db.get_repo_subscribers(repo_full_name)
             logger.info(f"Sending notifications to {len(subscribers)} subscribers for {repo_full_name}")
             
-            for chat_id in subscribers:
-                try:
-                    language = self.db.get_user_language(chat_id)
-                    self.send_commit_notification(chat_id, repo_full_name, commits, language)
-                except Exception as e:
-                    logger.error(f"Failed to send notification to {chat_id}: {e}")
+            if not subscribers:
+                return
+            
+            languages = self.db.get_user_languages(subscribers)
+            
+            # Each send blocks on Telegram's HTTP round-trip, so overlap them
+            with ThreadPoolExecutor(max_workers=min(4, len(subscribers))) as executor:
+                list(executor.map(
+                    lambda chat_id: self._safe_notify(chat_id, repo_full_name, commits, languages.get(chat_id)),
+                    subscribers
+                ))
+    
+    def _safe_notify(self, chat_id: int, repo_full_name: str, commits: List[Dict], language: Optional[str]):
+        try:
+            self.send_commit_notification(chat_id, repo_full_name, commits, language)
+        except Exception as e:
+            logger.error(f"Failed to send notification to {chat_id}: {e}")
     
     def send_commit_notification(self, chat_id: int, repo_full_name: str, commits: List[Dict], language: str):
         if not commits:
             return
         
-        for commit in commits[:5]:
-            try:
-                message = self._format_commit_message(repo_full_name, commit, language)
-                self.bot.send_message(
-                    chat_id, 
-                    message, 
-                    parse_mode='Markdown', 
-                    disable_web_page_preview=True
-                )
-                time.sleep(0.5)
-            except Exception as e:
-                logger.error(f"Error sending commit {commit['sha']} to {chat_id}: {e}")
+        parts = [self._format_commit_message(repo_full_name, commit, language) for commit in commits[:NOTIFY_COMMIT_LIMIT]]
         
-        if len(commits) > 5:
-            summary_msg = self.translation.get(
+        if len(commits) > NOTIFY_COMMIT_LIMIT:
+            parts.append(self.translation.get(
                 'commit_summary', 
                 language,
                 repo_full_name=repo_full_name,
                 total_commits=len(commits),
-                extra_count=len(commits) - 5
-            )
-            
+                extra_count=len(commits) - NOTIFY_COMMIT_LIMIT
+            ))
+        
+        # One message per subscriber, split only when it would exceed Telegram's limit
+        messages = []
+        current = ''
+        for part in parts:
+            candidate = f"{current}{COMMIT_SEPARATOR}{part}" if current else part
+            if current and len(candidate) > TELEGRAM_MESSAGE_LIMIT:
+                messages.append(current)
+                current = part
+            else:
+                current = candidate
+        messages.append(current)
+        
+        for message in messages:
             try:
-                self.bot.send_message(chat_id, summary_msg, parse_mode='Markdown')
+                self._send_message(chat_id, message, parse_mode='Markdown', disable_web_page_preview=True)
             except Exception as e:
-                logger.error(f"Error sending summary to {chat_id}: {e}")
+                logger.error(f"Error sending commits of {repo_full_name} to {chat_id}: {e}")
+    
+    def _send_message(self, chat_id: int, text: str, **kwargs):
+        """send_message that waits out a Telegram 429 once instead of pacing every call"""
+        try:
+            self.bot.send_message(chat_id, text, **kwargs)
+        except ApiTelegramException as e:
+            if e.error_code != 429:
+                raise
+            retry_after = (e.result_json or {}).get('parameters', {}).get('retry_after', 1)
+            logger.warning(f"Telegram flood limit for {chat_id}, retrying in {retry_after}s")
+            time.sleep(retry_after)
+            self.bot.send_message(chat_id, text, **kwargs)
     
     def _format_commit_message(self, repo_full_name: str, commit: Dict, language: str) -> str:
         commit_time = commit['date'].strftime('%Y/%m/%d - %H:%M:%S')
@@ -131,57 +241,47 @@ class MonitorManager:
             short_hash=short_hash
         )
         
-        changes_text = ""
-        if commit.get('added', 0) > 0:
-            if language == 'fa':
-                changes_text += f"➕ {commit['added']} فایل جدید\n"
-            else:
-                changes_text += f"➕ {commit['added']} new files\n"
+        labels = CHANGE_LABELS.get(language, CHANGE_LABELS['en'])
+        changes = [labels[kind].format(n=commit[kind]) for kind in ('added', 'removed', 'modified') if commit.get(kind, 0) > 0]
         
-        if commit.get('removed', 0) > 0:
-            if language == 'fa':
-                changes_text += f"➖ {commit['removed']} فایل حذف شده\n"
-            else:
-                changes_text += f"➖ {commit['removed']} files removed\n"
+        if not changes and commit.get('changed_files', 0) > 0:
+            # GraphQL stats only give a total file count plus line additions/deletions
+            changes.append(labels['changed_files'].format(
+                n=commit['changed_files'],
+                additions=commit.get('additions', 0),
+                deletions=commit.get('deletions', 0)
+            ))
         
-        if commit.get('modified', 0) > 0:
-            if language == 'fa':
-                changes_text += f"✏️ {commit['modified']} فایل تغییر یافته\n"
-            else:
-                changes_text += f"✏️ {commit['modified']} files modified\n"
+        changes_text = f"{labels['changes_header']}\n{''.join(changes)}\n" if changes else ""
+        links = labels['links'].format(commit_url=commit['url'], repo_full_name=repo_full_name)
         
-        if changes_text:
-            if language == 'fa':
-                message += f"📊 *تغییرات:*\n{changes_text}\n"
-            else:
-                message += f"📊 *Changes:*\n{changes_text}\n"
-        
-        if language == 'fa':
-            message += f"""🔗 *لینک‌ها:*
-• [مشاهده کامیت در GitHub]({commit['url']})
-• [مشاهده ریپازیتوری](https://github.com/{repo_full_name})"""
-        else:
-            message += f"""🔗 *Links:*
-• [View commit on GitHub]({commit['url']})
-• [View repository](https://github.com/{repo_full_name})"""
-        
-        return message
+        return f"{message}{changes_text}{links}"
     
     def start_monitoring(self):
+        self._stop_event.clear()
+        
         def monitoring_loop():
             logger.info("Monitoring loop started")
-            while self.running:
+            while not self._stop_event.is_set():
                 try:
                     self.check_all_repositories()
                 except Exception as e:
                     logger.error(f"Monitoring loop error: {e}")
                 
-                time.sleep(Config.CHECK_INTERVAL)
+                # Returns early as soon as stop_monitoring sets the event
+                self._stop_event.wait(Config.CHECK_INTERVAL)
         
-        monitor_thread = Thread(target=monitoring_loop, daemon=True)
-        monitor_thread.start()
+        self._monitor_thread = Thread(target=monitoring_loop, daemon=True)
+        self._monitor_thread.start()
         logger.info(f"✅ Monitoring started with interval {Config.CHECK_INTERVAL} seconds")
     
     def stop_monitoring(self):
-        self.running = False
-        logger.info("Monitoring stopped")
\ No newline at end of file
+        self._stop_event.set()
+        if self._monitor_thread is not None:
+            self._monitor_thread.join(timeout=STOP_TIMEOUT)
+            if self._monitor_thread.is_alive():
+                # Daemon thread, so it won't keep the process alive once we return
+                logger.warning(f"Monitoring thread still busy after {STOP_TIMEOUT}s, not waiting for it")
+            self._monitor_thread = None
+        self.github.close()
+        logger.info("Monitoring stopped")
@@ -0,0 +1,99 @@
+import logging
+import random
+import time
+from threading import Lock
+from typing import Optional
+
+import requests
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter:
+    """Token bucket shared by every GitHub request, plus header-driven throttling"""
+
+    def __init__(self, rate: float = 1.25, capacity: int = 4500, low_watermark: int = 100,
+                 max_backoff: int = 300, base_delay: float = 1.0, max_retry_delay: float = 30):
+        self.rate = rate
+        self.capacity = capacity
+        self.low_watermark = low_watermark
+        self.max_backoff = max_backoff
+        self.base_delay = base_delay
+        self.max_retry_delay = max_retry_delay
+        self._tokens = float(capacity)
+        self._updated = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = Lock()
+
+    def acquire(self):
+        """Block until a token is available and no rate-limit pause is in effect"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+
+                wait = self._blocked_until - now
+                if wait <= 0:
+                    if self._tokens >= 1:
+                        self._tokens -= 1
+                        return
+                    wait = (1 - self._tokens) / self.rate
+
+            time.sleep(wait)
+
+    def __enter__(self):
+        self.acquire()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+    def pause(self, seconds: float):
+        """Hold back every caller for the given number of seconds"""
+        seconds = min(max(seconds, 0), self.max_backoff)
+        with self._lock:
+            self._blocked_until = max(self._blocked_until, time.monotonic() + seconds)
+
+    def update(self, response: requests.Response):
+        """Read X-RateLimit-* headers and pause until the reset when the budget runs low"""
+        remaining = response.headers.get('X-RateLimit-Remaining')
+        reset = response.headers.get('X-RateLimit-Reset')
+        if remaining is None or reset is None:
+            return
+
+        try:
+            remaining = int(remaining)
+            reset = int(reset)
+        except ValueError:
+            return
+
+        if remaining <= self.low_watermark:
+            wait = reset - time.time()
+            if wait > 0:
+                logger.warning(f"GitHub rate limit low ({remaining} left), pausing requests for {wait:.0f}s")
+                # Not capped by max_backoff: the budget only comes back at the reset time
+                with self._lock:
+                    self._blocked_until = max(self._blocked_until, time.monotonic() + wait)
+
+    def is_rate_limited(self, response: requests.Response) -> bool:
+        if response.status_code == 429:
+            return True
+        return response.status_code == 403 and (
+            'Retry-After' in response.headers
+            or response.headers.get('X-RateLimit-Remaining') == '0'
+        )
+
+    def backoff_delay(self, response: requests.Response, attempt: int) -> float:
+        """Seconds to wait before retrying a rate-limited response"""
+        retry_after: Optional[str] = response.headers.get('Retry-After')
+        if retry_after is not None:
+            try:
+                return min(float(retry_after), self.max_backoff)
+            except ValueError:
+                pass
+        # Exponential with jitter so concurrent workers don't retry in lockstep
+        return min(self.base_delay * 2 ** attempt * (1 + random.random() * 0.5), self.max_retry_delay)
+
+
+github_rate_limiter = RateLimiter()
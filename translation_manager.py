@@ -1,78 +1,131 @@
 import json
 import os
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Optional, Tuple
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+DEFAULT_TRANSLATION_FILE = 'translations.json'
+
+_LANGUAGES = {
+    'en': 'English 🇺🇸',
+    'fa': 'فارسی 🇮🇷'
+}
+
+
+def _load_translations(translation_file: str) -> Dict:
+    """Load translations from JSON file"""
+    if not os.path.exists(translation_file):
+        default_translations = {
+            'en': {
+                'welcome': 'Welcome',
+                'help': 'Help',
+                'choose_language': 'Please choose your language:',
+                'language_set': 'Language has been set to {language_name}',
+                'repo_added': 'Repository successfully added: {repo_name}',
+                'repo_not_found': 'Repository not found: {repo_name}',
+                'repo_removed': 'Repository removed: {repo_name}',
+                'no_repositories': 'No repositories found',
+                'list_repos': 'Your repositories:',
+                'checking_repos': 'Checking {count} repositories...',
+                'check_complete': 'Check complete',
+                'stats': 'Statistics',
+                'connection_ok': 'Connection OK',
+                'connection_error': 'Connection error',
+                'unknown_command': 'Unknown command',
+                'commit_message': 'New commit: {commit_hash}',
+                'commit_summary': 'Commit summary: {total} commits'
+            },
+            'fa': {
+                'welcome': 'خوش آمدید',
+                'help': 'راهنما',
+                'choose_language': 'لطفاً زبان خود را انتخاب کنید:',
+                'language_set': 'زبان به {language_name} تنظیم شد',
+                'repo_added': 'ریپازیتوری با موفقیت اضافه شد: {repo_name}',
+                'repo_not_found': 'ریپازیتوری پیدا نشد: {repo_name}',
+                'repo_removed': 'ریپازیتوری حذف شد: {repo_name}',
+                'no_repositories': 'هیچ ریپازیتوری یافت نشد',
+                'list_repos': 'ریپازیتوری‌های شما:',
+                'checking_repos': 'در حال بررسی {count} ریپازیتوری...',
+                'check_complete': 'بررسی کامل شد',
+                'stats': 'آمار',
+                'connection_ok': 'اتصال موفق',
+                'connection_error': 'خطای اتصال',
+                'unknown_command': 'دستور ناشناخته',
+                'commit_message': 'کامیت جدید: {commit_hash}',
+                'commit_summary': 'خلاصه کامیت‌ها: {total} کامیت'
+            }
+        }
+        if orjson is not None:
+            with open(translation_file, 'wb') as f:
+                f.write(orjson.dumps(default_translations, option=orjson.OPT_INDENT_2))
+        else:
+            with open(translation_file, 'w', encoding='utf-8') as f:
+                json.dump(default_translations, f, ensure_ascii=False, indent=2)
+        return default_translations
+    
+    try:
+        if orjson is not None:
+            with open(translation_file, 'rb') as f:
+                return orjson.loads(f.read())
+        with open(translation_file, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (json.JSONDecodeError, IOError) as e:
+        print(f"Error loading translations: {e}")
+        return {'en': {}, 'fa': {}}
+
+
+# Parsed once at import and shared by every TranslationManager on the default file
+_TRANSLATIONS: Dict = _load_translations(DEFAULT_TRANSLATION_FILE)
+_TEMPLATE_CACHE: Dict[Tuple[str, str], Any] = {}
+
+
+def reload_translations():
+    """Reload the shared translations from file, in place so existing managers see the change"""
+    translations = _load_translations(DEFAULT_TRANSLATION_FILE)
+    _TRANSLATIONS.clear()
+    _TRANSLATIONS.update(translations)
+    _TEMPLATE_CACHE.clear()
 
 
 class TranslationManager:
-    def __init__(self, translation_file: str = 'translations.json'):
+    __slots__ = ('translation_file', 'translations', '_template_cache')
+    
+    def __init__(self, translation_file: str = DEFAULT_TRANSLATION_FILE):
         self.translation_file = translation_file
-        self.translations = self._load_translations()
+        if translation_file == DEFAULT_TRANSLATION_FILE:
+            self.translations = _TRANSLATIONS
+            self._template_cache = _TEMPLATE_CACHE
+        else:
+            self.translations = _load_translations(translation_file)
+            self._template_cache = {}
     
-    def _load_translations(self) -> Dict:
-        """Load translations from JSON file"""
-        if not os.path.exists(self.translation_file):
-            default_translations = {
-                'en': {
-                    'welcome': 'Welcome',
-                    'help': 'Help',
-                    'choose_language': 'Please choose your language:',
-                    'language_set': 'Language has been set to {language_name}',
-                    'repo_added': 'Repository successfully added: {repo_name}',
-                    'repo_not_found': 'Repository not found: {repo_name}',
-                    'repo_removed': 'Repository removed: {repo_name}',
-                    'no_repositories': 'No repositories found',
-                    'list_repos': 'Your repositories:',
-                    'checking_repos': 'Checking {count} repositories...',
-                    'check_complete': 'Check complete',
-                    'stats': 'Statistics',
-                    'connection_ok': 'Connection OK',
-                    'connection_error': 'Connection error',
-                    'unknown_command': 'Unknown command',
-                    'commit_message': 'New commit: {commit_hash}',
-                    'commit_summary': 'Commit summary: {total} commits'
-                },
-                'fa': {
-                    'welcome': 'خوش آمدید',
-                    'help': 'راهنما',
-                    'choose_language': 'لطفاً زبان خود را انتخاب کنید:',
-                    'language_set': 'زبان به {language_name} تنظیم شد',
-                    'repo_added': 'ریپازیتوری با موفقیت اضافه شد: {repo_name}',
-                    'repo_not_found': 'ریپازیتوری پیدا نشد: {repo_name}',
-                    'repo_removed': 'ریپازیتوری حذف شد: {repo_name}',
-                    'no_repositories': 'هیچ ریپازیتوری یافت نشد',
-                    'list_repos': 'ریپازیتوری‌های شما:',
-                    'checking_repos': 'در حال بررسی {count} ریپازیتوری...',
-                    'check_complete': 'بررسی کامل شد',
-                    'stats': 'آمار',
-                    'connection_ok': 'اتصال موفق',
-                    'connection_error': 'خطای اتصال',
-                    'unknown_command': 'دستور ناشناخته',
-                    'commit_message': 'کامیت جدید: {commit_hash}',
-                    'commit_summary': 'خلاصه کامیت‌ها: {total} کامیت'
-                }
-            }
-            with open(self.translation_file, 'w', encoding='utf-8') as f:
-                json.dump(default_translations, f, ensure_ascii=False, indent=2)
-            return default_translations
+    def _resolve_template(self, key: str, language: str) -> Any:
+        """Resolve (key, language) to its template, including the English fallback, and cache it"""
+        translation = self.translations.get(language, {}).get(key, key)
         
-        try:
-            with open(self.translation_file, 'r', encoding='utf-8') as f:
-                return json.load(f)
-        except (json.JSONDecodeError, IOError) as e:
-            print(f"Error loading translations: {e}")
-            return {'en': {}, 'fa': {}}
+        if translation == key and language != 'en':
+            translation = self.translations.get('en', {}).get(key, key)
+        
+        self._template_cache[(language, key)] = translation
+        return translation
     
     def get(self, key: str, language: str = 'en', **kwargs) -> str:
         """Get translation for a key with optional formatting"""
         try:
-            translation = self.translations.get(language, {}).get(key, key)
+            translation = self._template_cache.get((language, key))
+            if translation is None:
+                translation = self._resolve_template(key, language)
             
-            if translation == key and language != 'en':
-                translation = self.translations.get('en', {}).get(key, key)
+            if not kwargs:
+                return translation
             
-            if kwargs and isinstance(translation, str):
+            if isinstance(translation, str):
                 try:
-                    translation = translation.format(**kwargs)
+                    translation = translation.format_map(kwargs)
                 except (KeyError, ValueError) as format_error:
                     print(f"Formatting error for key '{key}': {format_error}")
                     pass
@@ -84,11 +137,14 @@ class TranslationManager:
     
     def get_all_languages(self) -> Dict[str, str]:
         """Get all available languages with display names"""
-        return {
-            'en': 'English 🇺🇸',
-            'fa': 'فارسی 🇮🇷'
-        }
+        return _LANGUAGES
     
     def reload_translations(self):
         """Reload translations from file"""
-        self.translations = self._load_translations()
\ No newline at end of file
+        if self.translations is _TRANSLATIONS:
+            reload_translations()
+            return
+        translations = _load_translations(self.translation_file)
+        self.translations.clear()
+        self.translations.update(translations)
+        self._template_cache.clear()
\ No newline at end of file